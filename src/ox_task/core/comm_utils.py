@@ -3,12 +3,91 @@
 
 import logging
 
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import smtplib
 
+# RFC 5322 limit on line length (excluding CRLF) for the message body.
+MAX_LINE_BYTES = 998
 
-def send_email(msg, subject, to_email, from_email, app_passwd, mode='plain'):
+
+def address_headers(from_email, to_email):
+    """Return encoded From/To header lines for build_message.
+
+    Senders which send many messages (e.g., GmailNotifier) can compute
+    this once and pass it to build_message as header_prefix.
+    """
+    return f'From: {from_email}\r\nTo: {to_email}\r\n'.encode('utf-8')
+
+
+def build_message(msg, subject, to_email, from_email, mode='plain',
+                  header_prefix=None):
+    """Build a single part email message as bytes ready for sendmail.
+
+    This formats the headers directly instead of going through the
+    email package generator which is slow for simple messages. The
+    body is sent as 8bit unless a line is too long for SMTP in which
+    case it is base64 encoded.
+
+    Args:
+        msg (str): The message body
+        subject (str): Email subject line
+        to_email (str): Recipient's email address
+        from_email (str): Sender's email address
+        mode (str): Either 'plain' or 'html'
+        header_prefix (bytes): Optional precomputed result of
+            address_headers(from_email, to_email).
+
+    Returns:
+        bytes: RFC 822 style message with CRLF line endings.
+    """
+    if mode not in ('plain', 'html'):
+        raise ValueError(f'Invalid email mode {mode!r}')
+    subject = ' '.join(subject.splitlines())
+    if not subject.isascii():
+        from email.header import (  # pylint: disable=import-outside-toplevel
+            Header)
+        subject = Header(subject, 'utf-8').encode(linesep='\r\n')
+    from email.utils import (  # pylint: disable=import-outside-toplevel
+        formatdate)
+    if header_prefix is None:
+        header_prefix = address_headers(from_email, to_email)
+    body = msg.replace('\r\n', '\n').replace('\n', '\r\n').encode('utf-8')
+    encoding = '8bit'
+    if any(len(line) > MAX_LINE_BYTES for line in body.split(b'\r\n')):
+        import base64  # pylint: disable=import-outside-toplevel
+        encoding = 'base64'
+        body = base64.encodebytes(body).replace(b'\n', b'\r\n')
+    return b''.join([
+        header_prefix,
+        (f'Date: {formatdate(localtime=True)}\r\n'
+         f'Subject: {subject}\r\nMIME-Version: 1.0\r\n'
+         f'Content-Type: text/{mode}; charset=utf-8\r\n'
+         f'Content-Transfer-Encoding: {encoding}\r\n\r\n').encode('ascii'),
+        body])
+
+
+def get_smtp_server(from_email, app_passwd, host='smtp.gmail.com',
+                    port=587):
+    """Connect and login to an SMTP server (Gmail by default).
+
+    Args:
+        from_email (str): Sender's Gmail address used to login
+        app_passwd (str): Gmail app password (not regular password)
+        host (str): SMTP host to connect to
+        port (int): SMTP port to connect to
+
+    Returns:
+        smtplib.SMTP: Connected server which callers can reuse for
+        multiple messages and should eventually close via quit().
+    """
+    import smtplib  # pylint: disable=import-outside-toplevel
+
+    server = smtplib.SMTP(host, port)
+    server.starttls()  # Enable encryption
+    server.login(from_email, app_passwd)
+    return server
+
+
+def send_email(msg, subject, to_email, from_email, app_passwd, mode='plain',
+               server=None, header_prefix=None):
     """Send an email via Gmail SMTP.
 
     Args:
@@ -17,31 +96,28 @@ def send_email(msg, subject, to_email, from_email, app_passwd, mode='plain'):
         to_email (str): Recipient's email address
         from_email (str): Sender's Gmail address
         app_passwd (str): Gmail app password (not regular password)
+        server (smtplib.SMTP): Optional connected server from
+            get_smtp_server. If provided, it is used and left open so
+            the caller can reuse it; otherwise we connect and quit.
+        header_prefix (bytes): Optional precomputed From/To headers
+            from address_headers.
 
     Returns:
         bool: True if email sent successfully, False otherwise
     """
     try:
         # Create message
-        email_msg = MIMEMultipart()
-        email_msg['From'] = from_email
-        email_msg['To'] = to_email
-        email_msg['Subject'] = subject
-
-        if mode == 'plain':
-            email_msg.attach(MIMEText(msg, 'plain'))
-        elif mode == 'html':
-            email_msg.attach(MIMEText(msg, 'html'))
+        email_msg = build_message(msg, subject, to_email, from_email, mode,
+                                  header_prefix=header_prefix)
 
-        # Gmail SMTP configuration
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()  # Enable encryption
-        server.login(from_email, app_passwd)
+        own_server = server is None
+        if own_server:
+            server = get_smtp_server(from_email, app_passwd)
 
         # Send email
-        text = email_msg.as_string()
-        server.sendmail(from_email, to_email, text)
-        server.quit()
+        server.sendmail(from_email, to_email, email_msg)
+        if own_server:
+            server.quit()
 
         print(f"Email sent successfully to {to_email}")
         return True
@@ -52,8 +128,27 @@ def send_email(msg, subject, to_email, from_email, app_passwd, mode='plain'):
 
 
 def shorten_msg(msg, max_len=400, max_lines=6):
-    short_msg = msg[:max_len]
-    short_msg = '\n'.join(short_msg.split('\n')[:max_lines])
-    if short_msg != msg:
-        short_msg += '...'
-    return short_msg
+    """Shorten msg to at most max_len characters and max_lines lines.
+
+    If anything was removed, '...' is appended. This scans for newlines
+    with str.find instead of splitting and joining the whole string.
+
+    >>> shorten_msg('abcdef', max_len=3)
+    'abc...'
+    >>> shorten_msg('a\\nb\\nc', max_lines=2)
+    'a\\nb...'
+    >>> shorten_msg('short')
+    'short'
+    """
+    end = min(len(msg), max_len)
+    cut, pos = end, 0
+    for _ in range(max_lines):
+        newline = msg.find('\n', pos, end)
+        if newline < 0:
+            break
+        pos = newline + 1
+    else:  # found max_lines newlines so cut at the last one
+        cut = pos - 1 if max_lines else 0
+    if cut < len(msg):
+        return msg[:cut] + '...'
+    return msg
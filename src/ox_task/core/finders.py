@@ -1,6 +1,7 @@
 """Tools to find useful things.
 """
 
+import functools
 import logging
 
 from ox_task.core import noters
@@ -8,37 +9,49 @@ from ox_task.core import noters
 class FindBuiltinNoter:
 
     def lookup(self, name):
+        # Not cached here so a noter added to the noters module later is
+        # still found; TaskNoteFinder.find_noter caches the hits.
         _ = self
-        result = getattr(noters, name, None)
-        return result
+        return getattr(noters, name, None)
 
     def __call__(self, name):
         return self.lookup(name)
-        
+
 
 class TaskNoteFinder:
 
     _lookup_funcs = {
         '__default__': FindBuiltinNoter()
         }
+    # Snapshot of _lookup_funcs.items() rebuilt whenever it changes.
+    _lookup_items = tuple(_lookup_funcs.items())
+
+    @classmethod
+    def _lookup_changed(cls):
+        cls._lookup_items = tuple(cls._lookup_funcs.items())
+        cls.find_noter.cache_clear()
 
     @classmethod
     def add_lookup_functor(cls, name, functor):
         if name in cls._lookup_funcs:
-            raise ValueError('Lookup function {name} already exists.')
+            raise ValueError(f'Lookup function {name} already exists.')
         cls._lookup_funcs[name] = functor
+        cls._lookup_changed()
 
     @classmethod
     def del_lookup_functor(cls, name):
         cls._lookup_funcs.pop(name, None)
+        cls._lookup_changed()
 
     @classmethod
+    @functools.lru_cache(maxsize=256)
     def find_noter(cls, name):
-        for functor_name, functor in cls._lookup_funcs.items():
-            logging.debug('Looking up noter %s using %s', name, functor_name)
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+        for functor_name, functor in cls._lookup_items:
+            if debug:
+                logging.debug('Looking up noter %s using %s',
+                              name, functor_name)
             result = functor(name)
             if result is not None:
                 return result
         raise KeyError(name)
-        
-    
@@ -1,11 +1,24 @@
-from typing import Dict, List, Optional, Union, Any
-from pydantic import BaseModel, Field
+from functools import cached_property, lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Union, Any
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+
+def is_dynamic_value(value: str) -> bool:
+    """Return True if a TaskEnv variable value needs evaluation.
+
+    Values wrapped in backticks are run through the shell and values
+    containing $ need template substitution; anything else is literal.
+    """
+    return '$' in value or (value.startswith('`') and value.endswith('`'))
 
 
 class TaskEnv(BaseModel):
     """
     Represents the environment to run a task.
     """
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     runtime: Optional[str] = Field(
         None,
         description="Python runtime environment (e.g., python3.11)"
@@ -25,6 +38,20 @@ class TaskEnv(BaseModel):
         description="Dictionary of environment variable names and values"
     )
 
+    @cached_property
+    def literal_env(self) -> Mapping[str, str]:
+        """Read-only mapping of the literal variables.
+
+        Literal variables do not depend on the job so they are found
+        once per TaskEnv instead of each time a job uses it. Dynamic
+        variables (see is_dynamic_value) still need to be evaluated
+        for each job. This does not include os.environ, which callers
+        should read when a job runs so changes to it are seen.
+        """
+        return MappingProxyType({
+            name: value for name, value in (self.variables or {}).items()
+            if not is_dynamic_value(value)})
+
 
 class TaskNote(BaseModel):
     """
@@ -36,16 +63,27 @@ class TaskNote(BaseModel):
             "(e.g., 'SimpleFileLog')"
         )
     )
-    
+
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, description=(
+            "Optional limit on how many notifications the Note class may "
+            "send at once (default is to send one at a time)."))
+
     # Allow additional fields for optional keywords passed to the class
-    class Config:
-        extra = "allow"  # Allows additional fields beyond defined ones
+    model_config = ConfigDict(extra="allow", frozen=True, defer_build=True)
+
+
+# TaskNote fields which configure how notes are sent rather than being
+# keyword arguments for the Note class.
+NOTE_META_FIELDS = frozenset({'class_name', 'description', 'max_concurrency'})
 
 
 class TaskJob(BaseModel):
     """
     Represents how to run the job for a task.
     """
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     env: str = Field(
         description="String name of a TaskEnv indicating environment to use"
     )
@@ -71,6 +109,8 @@ class TaskPlan(BaseModel):
     Root model representing a complete task plan.
     Contains dictionaries of environments, notes, and jobs.
     """
+    model_config = ConfigDict(frozen=True, defer_build=True)
+
     descsription: Optional[List[str]] = Field(
         description="Optional description or comments for plan.",
         default_factory=list)
@@ -87,4 +127,24 @@ class TaskPlan(BaseModel):
         description="Dictionary of TaskJob objects"
     )
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TaskPlan':
+        """Validate data (e.g., from a parsed file) into a TaskPlan."""
+        _ = cls
+        return _plan_adapter().validate_python(data)
 
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> 'TaskPlan':
+        """Validate raw JSON text into a TaskPlan without json.loads."""
+        _ = cls
+        return _plan_adapter().validate_json(data)
+
+
+@lru_cache(maxsize=None)
+def _plan_adapter() -> TypeAdapter:
+    """Build the TaskPlan validator on first use and reuse it after.
+
+    The models use defer_build so that importing this module (e.g., for
+    ``ox_task --help``) does not pay to build validation schemas.
+    """
+    return TypeAdapter(TaskPlan)
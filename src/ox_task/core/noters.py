@@ -1,94 +1,219 @@
 """Basic TaskNote classes.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 
-import requests
+from ox_task.core import comm_utils, models
 
-from ox_task.core import comm_utils
+
+# Bit flags for notifier conditions; see _COND_MAP for names used in
+# the "conditions" list of a TaskNote.
+COND_NON_EMPTY = 1 << 0
+
+_COND_MAP = {
+    'only_if_output_non_empty': COND_NON_EMPTY,
+}
 
 
 class Noter:
+    """Base class for notifiers.
+
+    Sub-classes should implement notify_message and can override
+    notify_many if they can send a batch of results more efficiently
+    (e.g., by reusing one connection). The "conditions" for a notifier
+    are converted to bit flags once by _parse_conditions and checked
+    in format_result_to_msg.
+    """
+
+    # A batch is aborted only if it has at least abort_min_batch items
+    # and more than a third of them fail to send.
+    abort_min_batch = 30
+
+    # Bit flags from _COND_MAP; sub-classes set via _parse_conditions.
+    _cond_flags = 0
+
+    # Maximum number of notifications notify_many sends at once. Set
+    # from the max_concurrency field of the TaskNote (if any).
+    max_concurrency = 1
+
+    @staticmethod
+    def _parse_conditions(conditions):
+        """Convert a list of condition names into bit flags.
+
+        Unknown conditions are logged and ignored so a plan using one
+        still sends its notifications.
+        """
+        flags = 0
+        for item in conditions or ():
+            flag = _COND_MAP.get(item)
+            if flag is None:
+                logging.warning('Ignoring unknown condition %r', item)
+            else:
+                flags |= flag
+        return flags
 
     def notify(self, config, job_results):
         raise NotImplementedError
+
+    def format_result_to_msg(self, job_result):
+        """Format job_result into a message or return None to skip it.
+        """
+        if self._cond_flags & COND_NON_EMPTY and not job_result.get('output'):
+            logging.info('Condition %s prevents notify job_result %s',
+                         'only_if_output_non_empty', job_result)
+            return None
+        return str(job_result)
+
+    def notify_result(self, job_result):
+        msg = self.format_result_to_msg(job_result)
+        if msg is None:
+            return None
+        return self.notify_message(msg)
+
+    def notify_message(self, msg):
+        raise NotImplementedError
+
+    def _try_notify_result(self, job_result):
+        """Call notify_result and return False if it raises."""
+        try:
+            return self.notify_result(job_result)
+        except Exception as problem:  # pylint: disable=broad-except
+            logging.exception('Unable to notify: %s', problem)
+            return False
+
+    def notify_many(self, job_results):
+        """Notify about each item in job_results.
+
+        Returns the number of failures. A notification fails if
+        notify_result raises an exception or returns False.
+
+        If self.max_concurrency is more than 1, up to that many
+        notifications are sent at once from a thread pool so slow
+        network round trips overlap.
+        """
+        failures = 0
+        pool, futures = None, []
+        workers = min(self.max_concurrency or 1, len(job_results))
+        if workers > 1:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            futures = [pool.submit(self._try_notify_result, item)
+                       for item in job_results]
+            outcomes = (future.result() for future in futures)
+        else:
+            outcomes = map(self._try_notify_result, job_results)
+        try:
+            for num, okay in enumerate(outcomes):
+                if okay is False:
+                    failures += 1
+                if (len(job_results) >= self.abort_min_batch
+                        and failures > len(job_results) // 3):
+                    logging.error(
+                        'Aborting batch after %s failures; skipping %s results',
+                        failures, len(job_results) - num - 1)
+                    failures += len(job_results) - num - 1
+                    break
+        finally:
+            for future in futures:  # no-op for ones which already ran
+                future.cancel()
+            if pool is not None:
+                pool.shutdown()
+        return failures
+
+
 def notify(task_note, results):
-    # Handle notification
+    """Notify about results using the notifier described by task_note.
+
+    Args:
+        task_note: TaskNote whose class_name names a notifier class in
+                   this module and whose other fields are its kwargs.
+        results: Job results dictionary to notify about.
+
+    Problems are recorded in results["notification_error"] instead of
+    being raised so a notification failure does not fail the job.
+    """
     try:
-        note_config = task_plan.notes.get(job_config.note)
-        if note_config:
-            # Get notifier class
-            notifier_class = getattr(noters, note_config.class_name)
-
-            # Extract additional kwargs (excluding class_name)
-            note_kwargs = {
-                k: v for k, v in note_config.dict().items()
-                if k != "class_name"
-            }
-
-            # Instantiate and call notifier
-            notifier = notifier_class(**note_kwargs)
-            notifier(job_results)
-
-    except Exception as e:
+        notifier_class = globals()[task_note.class_name]
+        note_kwargs = task_note.model_dump(exclude=models.NOTE_META_FIELDS)
+        notifier = notifier_class(**note_kwargs)
+        notifier.notify_result(results)
+
+    except Exception as e:  # pylint: disable=broad-except
         # Don't fail the job if notification fails
-        job_results["notification_error"] = str(e)
+        results["notification_error"] = str(e)
 
 
-class TelegramNotifier:
+class TelegramNotifier(Noter):
 
     def __init__(self, token, chat_id,
                  base_url="https://api.telegram.org",
                  conditions=None, **kwargs):
+        # Import here so importing noters does not pay for requests.
+        import requests  # pylint: disable=import-outside-toplevel
+        from requests.adapters import (  # pylint: disable=import-outside-toplevel
+            HTTPAdapter)
+        from urllib3.util.retry import (  # pylint: disable=import-outside-toplevel
+            Retry)
+
         self.token = token
         self.chat_id = chat_id
         self.base_url = base_url
         self.conditions = conditions
+        self._cond_flags = self._parse_conditions(conditions)
+        self._url = f"{base_url}/bot{token}/sendMessage"
+        self._session = requests.Session()
+        # sendMessage is not idempotent so only retry when we know the
+        # message was not sent: connection failures and 429 responses.
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=2, pool_maxsize=10, max_retries=Retry(
+                total=3, read=0, backoff_factor=0.3,
+                allowed_methods=['POST'], status_forcelist=[429])))
         kwargs.pop('class_name', None)
         kwargs.pop('description', None)
         if kwargs:
             logging.warning('Ignoring kwargs: %s', kwargs)
 
-    def format_result_to_msg(self, job_result):
-        if self.conditions:
-            for item in self.conditions:
-                if item == "only_if_output_non_empty":
-                    if not job_result.get("output", None):
-                        logging.info(
-                            'Condition %s prevents notify job_result %s',
-                            condition, job_result)
-                        return
-        return str(job_result)
-
-    def notify_result(self, job_result):
-        msg = self.format_result_to_msg(job_result)
-        self.notify_message(msg)
+    def notify_many(self, job_results):
+        """Send all job_results over our keep-alive HTTP session.
+        """
+        try:
+            return super().notify_many(job_results)
+        finally:
+            self.close()
 
     def notify_message(self, message):
-        url = f"{self.base_url}/bot{self.token}/sendMessage"
+        import requests  # pylint: disable=import-outside-toplevel
+
         payload = {
             "chat_id": self.chat_id,
             "text": message
         }
 
         try:
-            response = requests.post(url, data=payload)
+            response = self._session.post(self._url, data=payload, timeout=10)
             response.raise_for_status()  # Raise an exception for bad status codes
 
             json_response = response.json()
             if json_response.get("ok"):
                 logging.info("Message sent successfully!")
-            else:
-                logging.error(
-                    "Failed to send message. Telegram API response: %s",
-                    json_response)
+                return True
+            logging.error(
+                "Failed to send message. Telegram API response: %s",
+                json_response)
 
         except requests.exceptions.RequestException as e:
             logging.exception(
                 'Got exception trying to send message via Telegram')
+        return False
+
+    def close(self):
+        """Close the HTTP session and any pooled connections.
+        """
+        self._session.close()
 
 
-class GmailNotifier:
+class GmailNotifier(Noter):
 
     def __init__(self, to_email, from_email, app_passwd,
                  conditions=None, **kwargs):
@@ -96,71 +221,100 @@ class GmailNotifier:
         self.from_email = from_email
         self.app_passwd = app_passwd
         self.conditions = conditions
+        self._cond_flags = self._parse_conditions(conditions)
+        self._smtp = None
+        self._smtp_lock = threading.Lock()  # smtplib is not thread-safe
+        self._address_hdr = comm_utils.address_headers(from_email, to_email)
         kwargs.pop('class_name', None)
         kwargs.pop('description', None)
         if kwargs:
             logging.warning('Ignoring kwargs: %s', kwargs)
 
-    def format_result_to_msg(self, job_result):
-        return str(job_result)
+    def notify_many(self, job_results):
+        """Send all job_results over one SMTP session and then close it.
+        """
+        try:
+            return super().notify_many(job_results)
+        finally:
+            self.close()
 
-    def notify_result(self, job_result):
-        msg = self.format_result_to_msg(job_result)
-        self.notify_message(msg)
+    def _ensure_smtp(self):
+        """Return connected SMTP server, reconnecting only if needed.
+
+        We keep the server on self._smtp so repeated notifications reuse
+        one TLS session instead of doing connect/starttls/login each time.
+        """
+        if self._smtp is not None:
+            try:
+                code, _ = self._smtp.noop()
+            except Exception:  # pylint: disable=broad-except
+                code = None
+            if code != 250:
+                logging.info('SMTP connection is stale; reconnecting')
+                self.close()
+        if self._smtp is None:
+            self._smtp = comm_utils.get_smtp_server(
+                self.from_email, self.app_passwd)
+        return self._smtp
 
     def notify_message(self, msg):
         """Send an email via Gmail SMTP.
         """
         subject = msg.split('\n')[0]
-        comm_utils.send_email(msg, subject, self.to_email, self.from_email,
-                              self.app_passwd)
+        with self._smtp_lock:
+            try:
+                server = self._ensure_smtp()
+            except Exception as problem:  # pylint: disable=broad-except
+                logging.exception("Error connecting to SMTP: %s", problem)
+                return False
+            return comm_utils.send_email(
+                msg, subject, self.to_email, self.from_email, self.app_passwd,
+                server=server, header_prefix=self._address_hdr)
+
+    def close(self):
+        """Close the SMTP connection if we have one open.
+        """
+        server, self._smtp = self._smtp, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:  # pylint: disable=broad-except
+                logging.debug('Ignoring error closing SMTP connection')
+
+    def __del__(self):
+        if getattr(self, '_smtp', None) is not None:
+            self.close()
 
 
-class FileNotifier:
+class FileNotifier(Noter):
     """Notifier that just puts output in a file.
     """
 
     def __init__(self, path, conditions=None, **kwargs):
         self.path = path
         self.conditions = conditions
+        self._cond_flags = self._parse_conditions(conditions)
         kwargs.pop('class_name', None)
         kwargs.pop('description', None)
         if kwargs:
             logging.warning('Ignoring kwargs: %s', kwargs)
 
-    def format_result_to_msg(self, job_result):
-        return str(job_result)
-
-    def notify_result(self, job_result):
-        msg = self.format_result_to_msg(job_result)
-        self.notify_message(msg)
-
     def notify_message(self, msg):
         with open(self.path, 'w', encoding='utf8') as fdesc:
             fdesc.write(msg)
 
 
-class EchoNotifier:
+class EchoNotifier(Noter):
 
     def __init__(self, max_len=450, max_lines=6, conditions=None, **kwargs):
         self.max_len = max_len
         self.max_lines = max_lines
         self.conditions = conditions
+        self._cond_flags = self._parse_conditions(conditions)
         kwargs.pop('class_name', None)
         kwargs.pop('description', None)
         if kwargs:
             logging.warning('Ignoring kwargs: %s', kwargs)
 
-    def format_result_to_msg(self, job_result):
-        return str(job_result)
-
-    def notify_result(self, job_result):
-        msg = self.format_result_to_msg(job_result)
-        self.notify_message(msg)
-
     def notify_message(self, msg):
-        short_msg = msg[:self.max_len]
-        short_msg = '\n'.join(short_msg.split('\n')[:self.max_lines])
-        if short_msg != msg:
-            short_msg += '...'
-        print(short_msg)
+        print(comm_utils.shorten_msg(msg, self.max_len, self.max_lines))
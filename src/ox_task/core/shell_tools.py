@@ -1,12 +1,200 @@
 """Tools for doing shell operations.
 """
 
+import collections
+import functools
+import locale
+import os
+import selectors
+import shlex
+import shutil
 import subprocess
+import time
+
+
+@functools.lru_cache(maxsize=128)
+def _which(name, path):
+    """Cached shutil.which so we only search PATH once per program."""
+    return shutil.which(name, path=path)
+
+
+def _resolve_command(command, env, shell):
+    """Resolve the program for list commands run without a shell."""
+    if shell or isinstance(command, str) or not command:
+        return command
+    program = _which(command[0], (os.environ if env is None else env).get(
+        'PATH'))
+    if program is None:
+        return command
+    return [program, *command[1:]]
+
+
+# Shell builtins and keywords which need a real shell to run even if the
+# command has no special characters.
+_SHELL_ONLY_WORDS = frozenset({
+    '!', '.', ':', '{', 'alias', 'bg', 'break', 'case', 'cd', 'command',
+    'continue', 'eval', 'exec', 'exit', 'export', 'fg', 'for', 'function',
+    'getopts', 'hash', 'if', 'jobs', 'read', 'readonly', 'return',
+    'select', 'set', 'shift', 'source', 'time', 'times', 'trap', 'type',
+    'ulimit', 'umask', 'unalias', 'unset', 'until', 'wait', 'while'})
+
+
+def drop_needless_shell(command, env):
+    """Return (command, shell) so simple shell commands skip the shell.
+
+    Args:
+        command: List of strings to run with shell=True. As with
+                 subprocess, command[0] is the script for the shell.
+        env: Environment the command will run in.
+
+    Returns:
+        (command, False) with command split into arguments if running it
+        directly does the same thing as the shell would (e.g., for
+        'ls -l'), otherwise (command, True) unchanged. We only skip the
+        shell if every word is safe unquoted (see shlex.quote), the
+        program is found on the PATH, and the script is a single line.
+    """
+    if len(command) != 1 or '\n' in command[0] or '\r' in command[0]:
+        return command, True
+    args = command[0].split()
+    if (not args or args[0] in _SHELL_ONLY_WORDS or '=' in args[0]
+            or any(shlex.quote(arg) != arg for arg in args)
+            or _which(args[0], (os.environ if env is None else env).get(
+                'PATH')) is None):
+        return command, True
+    return args, False
 
 
 def run_shell_command(command, env, shell=True):
     """Execute a shell command and return the result"""
-    result = subprocess.run(command, shell=shell,
-                            capture_output=True, text=True, check=True,
+    result = subprocess.run(_resolve_command(command, env, shell),
+                            shell=shell, capture_output=True, check=True,
                             env=env)
-    return result.stdout.strip()
+    return result.stdout.strip().decode('utf-8', errors='replace')
+
+
+def run_shell_status(command, env, shell=True):
+    """Execute a shell command discarding output and return exit code"""
+    result = subprocess.run(_resolve_command(command, env, shell),
+                            shell=shell, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, check=False,
+                            env=env)
+    return result.returncode
+
+
+def decode_output(data, text):
+    """Decode data like subprocess.run(..., text=text) would."""
+    if not text:
+        return data
+    data = data.decode(locale.getpreferredencoding(False))
+    return data.replace('\r\n', '\n').replace('\r', '\n')
+
+
+class OutputTail:
+    """Keep the last max_lines lines (at most max_bytes) of a stream.
+
+    Feed chunks of bytes with feed and get the kept output with
+    getvalue. Memory use is bounded by about twice max_bytes no matter
+    how much is fed, even if the output has no newlines.
+    """
+
+    def __init__(self, max_lines=10_000, max_bytes=16 * 2**20):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._lines = collections.deque()
+        self._size = 0  # total length of self._lines
+        self._partial = bytearray()  # final line without a newline yet
+
+    def feed(self, data):
+        """Add the bytes in data to the tail."""
+        pieces = data.splitlines(keepends=True)
+        if pieces and not pieces[-1].endswith((b'\n', b'\r')):
+            last = pieces.pop()
+        else:
+            last = b''
+        for piece in pieces:
+            if self._partial:
+                self._partial += piece
+                piece = bytes(self._partial)
+                self._partial.clear()
+            self._lines.append(piece)
+            self._size += len(piece)
+        self._partial += last
+        if len(self._partial) > 2 * self.max_bytes:  # trim rarely
+            del self._partial[:-self.max_bytes]
+        while self._lines and (
+                len(self._lines) > self.max_lines
+                or self._size + len(self._partial) > self.max_bytes):
+            self._size -= len(self._lines.popleft())
+
+    def getvalue(self):
+        """Return the kept output as bytes."""
+        result = b''.join(self._lines) + self._partial
+        return result[-self.max_bytes:] if self.max_bytes else b''
+
+
+def run_capture_tail(command, max_lines=10_000, timeout=None, text=False,
+                     capture_output=True, check=False,
+                     max_bytes=16 * 2**20, **kwargs):
+    """Like subprocess.run(..., capture_output=True) but only keep a tail.
+
+    Output is read as it is produced and only the last max_lines lines
+    (and at most max_bytes bytes) of stdout and stderr are kept so a
+    command printing a huge amount does not need a huge amount of
+    memory. Output shorter than that is returned exactly as
+    subprocess.run would.
+
+    This uses selectors on the pipes so it is POSIX only. Other keyword
+    arguments are passed to subprocess.Popen so run only arguments other
+    than timeout, text, capture_output, and check (e.g., input) are not
+    supported.
+
+    Returns:
+        A subprocess.CompletedProcess. If timeout expires, the command
+        is killed and subprocess.TimeoutExpired is raised with the
+        output seen so far. If check is True and the command fails,
+        subprocess.CalledProcessError is raised as for subprocess.run.
+    """
+    if not capture_output:
+        raise ValueError('run_capture_tail requires capture_output=True')
+    deadline = None if timeout is None else time.monotonic() + timeout
+    tails = {}
+
+    def kill_and_raise(proc):
+        proc.kill()
+        proc.wait()
+        stdout, stderr = (decode_output(tails[s].getvalue(), text)
+                          for s in (proc.stdout, proc.stderr))
+        raise subprocess.TimeoutExpired(
+            command, timeout, output=stdout, stderr=stderr)
+
+    with subprocess.Popen(command, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, **kwargs) as proc:
+        with selectors.DefaultSelector() as selector:
+            for stream in (proc.stdout, proc.stderr):
+                selector.register(stream, selectors.EVENT_READ)
+                tails[stream] = OutputTail(max_lines, max_bytes)
+            while selector.get_map():
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        kill_and_raise(proc)
+                for key, _ in selector.select(remaining):
+                    data = os.read(key.fd, 65536)
+                    if data:
+                        tails[key.fileobj].feed(data)
+                    else:
+                        selector.unregister(key.fileobj)
+        # The command may close its output and keep running.
+        try:
+            returncode = proc.wait(None if deadline is None else max(
+                0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            kill_and_raise(proc)
+    stdout, stderr = (decode_output(tails[s].getvalue(), text)
+                      for s in (proc.stdout, proc.stderr))
+    result = subprocess.CompletedProcess(command, returncode, stdout, stderr)
+    if check:
+        result.check_returncode()
+    return result
@@ -1,12 +1,22 @@
 """Command line interface for some simple tasks.
 """
 
-import json
+import itertools
 import logging
 
 import click
 import requests
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as _json_loads
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
 
 @click.group()
 def cli():
@@ -28,6 +38,54 @@ def weather(latitude, longitude, timeout):
     return results
 
 
+def _stream_tickers(fdesc, wanted):
+    """Incrementally parse ticker items from fdesc and keep the wanted ones.
+
+    Stops reading as soon as every ticker in wanted has been seen so
+    we usually avoid holding the whole (large) file in memory.
+    """
+    remaining = set(wanted) - {''}
+    by_ticker = {}
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    for num_key, item in ijson.kvitems(fdesc, '', use_float=True):
+        if debug:
+            logging.debug('Processing item #%s: %s', num_key, item)
+        ticker = item['ticker']
+        if ticker in wanted:
+            by_ticker[ticker] = item
+            remaining.discard(ticker)
+            if not remaining:
+                break
+    return by_ticker
+
+
+def _index_tickers(data):
+    """Index fully parsed ticker data by ticker symbol."""
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        for num_key, item in data.items():
+            logging.debug('Processing item #%s: %s', num_key, item)
+    return {item['ticker']: item for item in data.values()}
+
+
+def _load_tickers(url, agent, timeout, wanted):
+    """Load ticker data from url and return dict keyed by ticker.
+
+    If ijson is installed the data is streamed and the result may only
+    contain the tickers in wanted; otherwise all tickers are returned.
+    """
+    if url.startswith('file://'):
+        with open(url[7:], 'rb') as fdesc:
+            if ijson is not None:
+                return _stream_tickers(fdesc, wanted)
+            return _index_tickers(_json_loads(fdesc.read()))
+    with requests.get(url, headers={'user-agent': agent}, timeout=timeout,
+                      stream=ijson is not None) as req:
+        if ijson is not None:
+            req.raw.decode_content = True
+            return _stream_tickers(req.raw, wanted)
+        return _index_tickers(_json_loads(req.content))
+
+
 @click.option('--alert-exists', default='')
 @click.option('--alert-not-exists', default='')
 @click.option('--url',
@@ -37,24 +95,18 @@ def weather(latitude, longitude, timeout):
 @click.option('--timeout', type=float, default=30)
 @cli.command
 def check_tickers(alert_exists, alert_not_exists, url, agent, timeout):
-    alert_exists = set(alert_exists.split(','))
-    alert_not_exists = set(alert_not_exists.split(','))
-    results = {t: 'not found' for t in alert_not_exists}
+    alert_exists = frozenset(
+        alert_exists.split(',')) if alert_exists else frozenset()
+    alert_not_exists = frozenset(
+        alert_not_exists.split(',')) if alert_not_exists else frozenset()
+    results = {}
     if alert_exists or alert_not_exists:
-        if url.startswith('file://'):
-            with open(url[7:], encoding='utf8') as fdesc:
-                data = json.load(fdesc)
-        else:
-            req = requests.get(url, headers={
-                'user-agent': agent}, timeout=timeout)
-            data = req.json()
-        for num_key, item in data.items():
-            logging.debug('Processing item #%s: %s', num_key, item)
-            ticker = item['ticker']
-            if ticker in alert_exists:
-                results[ticker] = item
-            if ticker in alert_not_exists:
-                results.pop(ticker, None)
+        by_ticker = _load_tickers(url, agent, timeout,
+                                  alert_exists | alert_not_exists)
+        hits = alert_exists & by_ticker.keys()
+        misses = alert_not_exists - by_ticker.keys()
+        results = {t: by_ticker.get(t, 'not found')
+                   for t in itertools.chain(misses, hits)}
     click.echo(results)
 
 
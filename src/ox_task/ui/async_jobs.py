@@ -0,0 +1,144 @@
+"""Run jobs from a task plan concurrently with asyncio.
+
+This is used by the run command for --max-jobs N with N > 1. It is in
+its own module so that the cli module (and runs which do one job at a
+time) do not need to load asyncio.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+import click
+
+from ox_task.core import models, shell_tools
+from ox_task.ui import cli
+
+
+async def _read_into(stream: asyncio.StreamReader,
+                     tail: shell_tools.OutputTail) -> None:
+    """Read stream until EOF feeding what we read into tail."""
+    while True:
+        data = await stream.read(65536)
+        if not data:
+            return
+        tail.feed(data)
+
+
+async def async_run_command(command: List[str], cwd: str,
+                            env: Dict[str, str], shell: bool = False,
+                            timeout: float = None) -> Dict[str, Any]:
+    """Async version of simple_run_command using asyncio subprocesses.
+
+    Args:
+        command: Command to run as a list of strings. If shell is True
+                 it is run like subprocess.run(command, shell=True).
+        cwd: Working directory for the command.
+        env: Environment variables for the command.
+        shell: Whether to run the command via /bin/sh.
+        timeout: Optional timeout in seconds.
+
+    Returns:
+        Dictionary containing execution results like simple_run_command.
+
+    As for simple_run_command, only a tail of the output is kept (see
+    shell_tools.OutputTail), output is decoded like text=True, and the
+    output read before a timeout is kept in the results.
+    """
+    job_results = {'cwd': cwd}
+    args = ['/bin/sh', '-c', *command] if shell else command
+    proc = None
+    out_tail, err_tail = shell_tools.OutputTail(), shell_tools.OutputTail()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args, cwd=cwd, env=env, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
+        await asyncio.wait_for(asyncio.gather(
+            _read_into(proc.stdout, out_tail),
+            _read_into(proc.stderr, err_tail), proc.wait()), timeout)
+        cli.set_command_results(
+            job_results, command, proc.returncode,
+            shell_tools.decode_output(out_tail.getvalue(), True),
+            shell_tools.decode_output(err_tail.getvalue(), True))
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        job_results.update(
+            status="timeout", exit_code=-1, error="Command timed out",
+            output=shell_tools.decode_output(out_tail.getvalue(), True),
+            stderr=shell_tools.decode_output(err_tail.getvalue(), True),
+            command=command)
+    except asyncio.CancelledError:
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+        raise
+    except Exception as e:
+        logging.exception('Unable to run command')
+        job_results.update(
+            status="error", exit_code=-1, error=str(e),
+            output="", stderr="", command=command)
+
+    return job_results
+
+
+async def async_run_job(working_dir: str, task_plan: models.TaskPlan,
+                        job_name: str, re_raise=True,
+                        note_queue=None,
+                        setup_errors=None) -> Dict[str, Any]:
+    """Async version of cli.run_job so several jobs can run at once.
+
+    Setting up the job environment (e.g., creating a venv) is done in a
+    worker thread and the command itself is run via async_run_command.
+    """
+    if job_name not in task_plan.jobs:
+        return cli.missing_job_results(job_name)
+
+    job_spec = {}
+    try:
+        job_spec = await asyncio.get_running_loop().run_in_executor(
+            None, cli.prepare_job, working_dir, task_plan, job_name,
+            setup_errors)
+        job_results = await async_run_command(**job_spec)
+    except Exception as problem:
+        job_results = cli.failed_job_results(problem)
+
+    return cli.finish_job(task_plan, job_name, job_spec, job_results,
+                          re_raise, note_queue)
+
+
+async def _run_jobs(working_dir: str, task_plan: models.TaskPlan,
+                    re_raise: bool, note_queue: cli.NotificationQueue,
+                    all_results: Dict[str, Dict[str, Any]],
+                    max_jobs: int, setup_errors=None) -> None:
+    """Run jobs in task_plan with at most max_jobs running at once.
+
+    Since jobs finish in any order, the status for each job is echoed
+    under its name when it finishes.
+    """
+    limit = asyncio.Semaphore(max_jobs)
+    echo_lock = asyncio.Lock()
+
+    async def run_one(job_name):
+        async with limit:
+            job_result = await async_run_job(
+                working_dir, task_plan, job_name, re_raise,
+                note_queue=note_queue, setup_errors=setup_errors)
+        all_results[job_name] = job_result
+        async with echo_lock:  # keep status lines for a job together
+            click.echo(f"Finished job: {job_name}")
+            cli.echo_job_result(job_result)
+
+    await asyncio.gather(*(run_one(name) for name in task_plan.jobs))
+
+
+def run_jobs(working_dir: str, task_plan: models.TaskPlan, re_raise: bool,
+             note_queue: cli.NotificationQueue,
+             all_results: Dict[str, Dict[str, Any]], max_jobs: int,
+             setup_errors=None) -> None:
+    """Like cli._run_jobs but run up to max_jobs jobs at once.
+
+    Results are stored in all_results as they finish so the caller
+    still has partial results if a job raises.
+    """
+    asyncio.run(_run_jobs(working_dir, task_plan, re_raise, note_queue,
+                          all_results, max_jobs, setup_errors))
@@ -2,23 +2,34 @@
 Task runner script that executes job plans defined in JSON or Python files.
 """
 
+from collections import ChainMap
 from contextlib import ExitStack
-import importlib
+import functools
 import importlib.util
 import json
 import logging
 import os
+import shlex
+import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from string import Template
-from typing import Any, Dict, List, Union
+from typing import TYPE_CHECKING, Any, Dict, List, MutableMapping, Union
 
 import click
-import requests
 
-from ox_task.core import finders, models, noters, shell_tools, comm_utils
+if TYPE_CHECKING:  # requests is imported where used to speed up start up
+    import requests
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as _json_loads
+
+from ox_task.core import finders, models, shell_tools, comm_utils
 
 
 @click.group
@@ -36,6 +47,21 @@ def find_path(module):
     return spec.origin
 
 
+@functools.lru_cache(maxsize=None)
+def _get_session() -> 'requests.Session':
+    """Return a shared HTTP session so repeated downloads reuse connections.
+    """
+    # Import here so commands which do not download skip loading requests.
+    import requests  # pylint: disable=import-outside-toplevel
+    from requests.adapters import (  # pylint: disable=import-outside-toplevel
+        HTTPAdapter)
+
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4, pool_maxsize=8))
+    return session
+
+
 @main.command
 @click.option('--url', required=True,
               help='URL for GitHub file to download.')
@@ -54,11 +80,13 @@ def github_file(url, outfile, timeout):
     raw_url = url.replace("github.com", "raw.githubusercontent.com").replace(
         "/blob/", "/")
 
-    response = requests.get(raw_url, timeout=timeout)
-    response.raise_for_status()
-
-    with open(outfile, 'wb') as f:
-        f.write(response.content)
+    # Stream the body to the file so we do not hold it all in memory.
+    # Use iter_content (not response.raw) so any gzip encoding is undone.
+    with _get_session().get(raw_url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        with open(outfile, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
 
 
 @main.command
@@ -98,16 +126,35 @@ be used (`ox_task run` will setup paths to make this happen).
     return result
 
 
-def notify_result(task_plan: models.TaskPlan, noter_name: str,
-                 job_results: Dict[str, Any], env_vars: Dict[str, str]) -> None:
-    """Notify about job results using configured noter.
+@functools.lru_cache(maxsize=1024)
+def _tmpl(text: str) -> Template:
+    """Return Template for text, reusing it if we have seen text before."""
+    return Template(text)
+
+
+@functools.lru_cache(maxsize=512)
+def _shsplit(text: str) -> tuple:
+    """Split command text into arguments like a POSIX shell would.
+
+    Unlike str.split this handles quoted arguments with spaces.
+    """
+    return tuple(shlex.split(text))
+
+
+def _make_noter_spec(task_plan: models.TaskPlan, noter_name: str,
+                     env_vars: Dict[str, str]):
+    """Find the noter class and keyword arguments for noter_name.
 
     Args:
         task_plan: The task plan containing noter configurations
         noter_name: Name of the noter to use
-        job_results: Results from job execution
         env_vars: Environment variables for template substitution
+
+    Returns:
+        Tuple of (klass, kwargs, max_concurrency) where klass(**kwargs)
+        creates the noter and max_concurrency is from the TaskNote.
     """
+    max_concurrency = None
     if not noter_name:
         logging.warning('No TaskNote configured for task_plan %s; using %s',
                         task_plan, 'EchoNotifier')
@@ -120,14 +167,106 @@ def notify_result(task_plan: models.TaskPlan, noter_name: str,
 
         klass = finders.TaskNoteFinder.find_noter(note_config.class_name)
         kwargs = {
-            k: Template(v).safe_substitute(env_vars) if isinstance(v, str) else v
-            for k, v in note_config.model_dump().items()
+            k: _tmpl(v).safe_substitute(env_vars)
+            if isinstance(v, str) and '$' in v else v
+            for k, v in note_config.model_dump(
+                exclude=models.NOTE_META_FIELDS).items()
         }
+        max_concurrency = note_config.max_concurrency
+    return klass, kwargs, max_concurrency
+
+
+def notify_result(task_plan: models.TaskPlan, noter_name: str,
+                 job_results: Dict[str, Any], env_vars: Dict[str, str],
+                 note_queue=None) -> None:
+    """Notify about job results using configured noter.
+
+    Args:
+        task_plan: The task plan containing noter configurations
+        noter_name: Name of the noter to use
+        job_results: Results from job execution
+        env_vars: Environment variables for template substitution
+        note_queue: Optional NotificationQueue. If provided, the
+                    notification is queued to be sent when the queue
+                    is flushed instead of being sent immediately.
+    """
+    klass, kwargs, max_concurrency = _make_noter_spec(
+        task_plan, noter_name, env_vars)
+    if note_queue is not None:
+        note_queue.add(klass, kwargs, job_results, max_concurrency)
+        return
 
     my_noter = klass(**kwargs)
     my_noter.notify_result(job_results)
 
 
+class NotificationQueue:
+    """Queue of job results grouped by notifier.
+
+    Results are grouped by notifier class and configuration so that
+    flush can instantiate each notifier once and send all of its
+    results via notify_many (e.g., over a single SMTP or HTTP session).
+    Different notifiers are flushed concurrently so a slow provider
+    does not hold up the others.
+    """
+
+    # Maximum number of notifiers to flush at once.
+    max_workers = 8
+
+    def __init__(self):
+        self._queue = {}
+
+    def add(self, klass, kwargs: Dict[str, Any],
+            job_results: Dict[str, Any], max_concurrency=None) -> None:
+        """Queue job_results to be sent by klass(**kwargs).
+
+        If max_concurrency is given, the notifier may send up to that
+        many of its queued results at once.
+        """
+        key = (klass, json.dumps(kwargs, sort_keys=True, default=str),
+               max_concurrency)
+        self._queue.setdefault(key, (kwargs, []))[1].append(job_results)
+
+    @staticmethod
+    def _send(klass, my_noter, results) -> int:
+        """Send results with my_noter and return number of failures."""
+        try:
+            if hasattr(my_noter, 'notify_many'):
+                return my_noter.notify_many(results)
+            for item in results:
+                my_noter.notify_result(item)
+        except Exception as problem:  # pylint: disable=broad-except
+            logging.exception('Unable to notify with %s: %s',
+                              klass, problem)
+            return len(results)
+        return 0
+
+    def flush(self) -> int:
+        """Send all queued notifications and return number of failures."""
+        queue, self._queue = self._queue, {}
+        failures = 0
+        batches = []
+        for (klass, _, max_concurrency), (kwargs, results) in queue.items():
+            try:
+                my_noter = klass(**kwargs)
+            except Exception as problem:  # pylint: disable=broad-except
+                logging.exception('Unable to notify with %s: %s',
+                                  klass, problem)
+                failures += len(results)
+                continue
+            if max_concurrency:
+                my_noter.max_concurrency = max_concurrency
+            batches.append((klass, my_noter, results))
+
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(
+                    self.max_workers, len(batches))) as pool:
+                failures += sum(pool.map(lambda b: self._send(*b), batches))
+        else:
+            failures += sum(self._send(*b) for b in batches)
+        return failures
+
+
 def _create_virtual_environment(job_dir: str, env_config) -> None:
     """Create a virtual environment for the job."""
     runtime = env_config.runtime or "python3"
@@ -140,25 +279,40 @@ def _create_virtual_environment(job_dir: str, env_config) -> None:
     )
 
 
-def _install_requirements(job_dir: str, env_config) -> None:
-    """Install requirements in the virtual environment."""
+def _find_installer(venv_path: str) -> List[str]:
+    """Return command prefix to install packages into venv_path.
 
-    venv_path = os.path.join(job_dir, "venv")
+    We use uv if it is on the PATH since it is much faster than pip and
+    fall back to the pip inside the venv otherwise.
+    """
     if os.name == "nt":  # Windows
-        pip_path = os.path.join(venv_path, "Scripts", "pip.exe")
+        bin_dir, exe = os.path.join(venv_path, "Scripts"), ".exe"
     else:
-        pip_path = os.path.join(venv_path, "bin", "pip")
+        bin_dir, exe = os.path.join(venv_path, "bin"), ""
+
+    uv_path = shutil.which("uv")
+    if uv_path:
+        return [uv_path, "pip", "install", "--python",
+                os.path.join(bin_dir, "python" + exe)]
+    return [os.path.join(bin_dir, "pip" + exe), "install", "--no-input",
+            "--disable-pip-version-check"]
 
+
+def _install_requirements(job_dir: str, env_config) -> None:
+    """Install requirements in the virtual environment."""
+
+    venv_path = os.path.join(job_dir, "venv")
     req_list = list(env_config.requirements) if env_config.requirements else []
 
     if not any(['ox_task' in r for r in req_list]):
         req_list.append('git+https://github.com/aocks/ox_task.git')#FIXME: make this pip
-    for requirement in req_list:
-        subprocess.run(
-            [pip_path, "install", requirement],
-            check=True,
-            cwd=job_dir
-        )
+    # Install everything with one call so we only pay for installer
+    # startup and dependency resolution once.
+    subprocess.run(
+        [*_find_installer(venv_path), *req_list],
+        check=True,
+        cwd=job_dir
+    )
 
 
 def setup_job_environment(working_dir: str, job_name: str,
@@ -175,20 +329,65 @@ def setup_job_environment(working_dir: str, job_name: str,
 
     Returns:
         Path to the job directory
+
+    If setting up a new job directory fails, the directory is removed
+    so that a later call tries again instead of using a broken venv.
     """
     job_dir = os.path.join(working_dir, job_name)
 
-    if not os.path.exists(job_dir):
+    try:
         os.makedirs(job_dir)
+        created = True
+    except FileExistsError:
+        created = False
+
+    if created:
+        try:
+            env_config = task_plan.envs.get(env_name)
+            if not env_config:
+                raise ValueError(
+                    f"Environment '{env_name}' not found in task plan")
+
+            _create_virtual_environment(job_dir, env_config)
+            _install_requirements(job_dir, env_config)
+        except BaseException:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+    return job_dir
 
-        env_config = task_plan.envs.get(env_name)
-        if not env_config:
-            raise ValueError(f"Environment '{env_name}' not found in task plan")
 
-        _create_virtual_environment(job_dir, env_config)
-        _install_requirements(job_dir, env_config)
+def _setup_job_environments(
+        working_dir: str,
+        task_plan: models.TaskPlan) -> Dict[str, Exception]:
+    """Set up environments for all jobs in task_plan in parallel.
 
-    return job_dir
+    Creating a venv and installing requirements mostly waits on
+    subprocesses and the network, so doing it in a thread pool makes
+    setup take about as long as the slowest job instead of the sum.
+
+    Returns:
+        Dictionary mapping the name of each job whose environment could
+        not be set up to the exception raised. Pass this to run_job as
+        setup_errors so the job reports the problem instead of trying
+        the (possibly slow) setup again.
+    """
+    setup_errors = {}
+    if len(task_plan.jobs) < 2:
+        return setup_errors
+    with ThreadPoolExecutor(max_workers=min(8, len(task_plan.jobs))) as pool:
+        futures = {
+            pool.submit(setup_job_environment, working_dir, job_name,
+                        task_plan, job_config.env): job_name
+            for job_name, job_config in task_plan.jobs.items()}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as problem:  # pylint: disable=broad-except
+                logging.warning('Unable to set up environment for %s: %s',
+                                futures[future], problem)
+                setup_errors[futures[future]] = problem
+    return setup_errors
 
 
 def simple_run_command(command: List[str], **kwargs) -> Dict[str, Any]:
@@ -201,17 +400,22 @@ def simple_run_command(command: List[str], **kwargs) -> Dict[str, Any]:
 
     Returns:
         Dictionary containing execution results
+
+    If capture_output is True we stream the output and keep only the
+    last 10,000 lines of stdout and stderr (see shell_tools) so that
+    commands with very long output do not use lots of memory. That
+    supports the usual subprocess.run arguments except input, for
+    which we fall back to subprocess.run.
     """
     job_results = {'cwd': kwargs.get('cwd', os.getcwd())}
     try:
-        result = subprocess.run(command, **kwargs)
-        job_results.update(
-            status="success" if result.returncode == 0 else "failed",
-            exit_code=result.returncode,
-            output=result.stdout, stderr=result.stderr,
-            command=command)
-        if job_results['exit_code'] != 0 and 'error' not in job_results:
-            job_results['error'] = job_results.get('stderr', 'unknown')
+        if (kwargs.get('capture_output') and os.name != 'nt'
+                and 'input' not in kwargs):
+            result = shell_tools.run_capture_tail(command, **kwargs)
+        else:
+            result = subprocess.run(command, **kwargs)
+        set_command_results(job_results, command, result.returncode,
+                            result.stdout, result.stderr)
 
     except subprocess.TimeoutExpired as e:
         job_results.update(
@@ -228,19 +432,45 @@ def simple_run_command(command: List[str], **kwargs) -> Dict[str, Any]:
     return job_results
 
 
+def set_command_results(job_results: Dict[str, Any], command: List[str],
+                        returncode: int, stdout, stderr) -> None:
+    """Put results of a finished command into job_results."""
+    job_results.update(
+        status="success" if returncode == 0 else "failed",
+        exit_code=returncode, output=stdout, stderr=stderr,
+        command=command)
+    if job_results['exit_code'] != 0 and 'error' not in job_results:
+        job_results['error'] = job_results.get('stderr', 'unknown')
+
+
 def _prepare_environment_variables(
-        job_dir, job_name, env_config) -> Dict[str, str]:
+        job_dir, job_name, env_config) -> MutableMapping[str, str]:
     """
     Prepare environment variables with shell command execution and templating.
+
+    Literal variables are already collected in env_config.literal_env
+    so only dynamic variables (backticks or $ templates) are evaluated
+    here.
+
+    Backtick commands are run for every job with the full job
+    environment (including OX_TASK_JOB_NAME) so they can give a
+    different value for each job.
+
+    The result is a ChainMap with the per-job variables in front of
+    the shared env_config.literal_env and the current os.environ so we
+    do not copy the whole environment for each job.
     """
-    env_vars = os.environ.copy()
+    env_vars = ChainMap({}, env_config.literal_env, os.environ)
     env_vars['OX_TASK_JOB_NAME'] = job_name
     if env_config.variables:
         for name, value in list(env_config.variables.items()):
+            if not models.is_dynamic_value(value):
+                continue
             if value.startswith('`') and value.endswith('`'):
-                value = shell_tools.run_shell_command(value[1:-1], env=env_vars)
+                value = shell_tools.run_shell_command(
+                    value[1:-1], env=dict(env_vars))
             else:
-                value = Template(value).safe_substitute(env_vars)
+                value = _tmpl(value).safe_substitute(env_vars)
             env_vars[name] = value
 
     # Must set path so that subprocesses will use the right venv if
@@ -252,68 +482,86 @@ def _prepare_environment_variables(
     return env_vars
 
 
-def run_job(working_dir: str, task_plan: models.TaskPlan,
-            job_name: str, re_raise=True) -> Dict[str, Any]:
-    """Run a single job from the task plan.
+def prepare_job(working_dir: str, task_plan: models.TaskPlan,
+                job_name: str, setup_errors=None) -> Dict[str, Any]:
+    """Set up the environment for job_name and work out how to run it.
 
-    Args:
-        working_dir: Base working directory for job execution
-        task_plan: Parsed task plan containing job definitions
-        job_name: Name of the job to run
+    If job_name is in setup_errors (from _setup_job_environments), that
+    error is raised instead of trying to set up the environment again.
 
     Returns:
-        Dictionary containing job execution results
+        Dictionary of keyword arguments describing how to run the job
+        (command, cwd, env, shell, timeout).
     """
-    command = 'unknown'
-    job_config = task_plan.jobs.get(job_name)
-    if not job_config:
-        return {"status": "error", "exit_code": -1,
-                "error": f"Job '{job_name}' not found in task plan",
-                "output": "", "stderr": ""}
+    job_config = task_plan.jobs[job_name]
+    if setup_errors and job_name in setup_errors:
+        raise setup_errors[job_name]
+    # Set up job environment
+    job_dir = setup_job_environment(
+        working_dir, job_name, task_plan, job_config.env)
+
+    # Get environment configuration for path and vars
+    env_config = task_plan.envs[job_config.env]
+
+    # Prepare command
+    if isinstance(job_config.command, str) and job_config.shell:
+        command = [job_config.command]  # the whole string is the script
+    elif isinstance(job_config.command, str):
+        command = list(_shsplit(job_config.command))
+    else:
+        command = job_config.command
+    if not isinstance(command, (list, tuple)):
+        raise ValueError(f'Expected list or tuple for {command=}')
 
-    try:
-        env_vars = {}
-        # Set up job environment
-        job_dir = setup_job_environment(
-            working_dir, job_name, task_plan, job_config.env)
+    # Set up environment variables
+    env_vars = _prepare_environment_variables(job_dir, job_name, env_config)
 
-        # Get environment configuration for path and vars
-        env_config = task_plan.envs[job_config.env]
+    # Add venv to PATH
+    venv_bin = os.path.join(job_dir, "venv", "bin")
+    if os.name == "nt":  # Windows
+        venv_bin = os.path.join(job_dir, "venv", "Scripts")
+    env_vars["PATH"] = f"{venv_bin}{os.pathsep}{env_vars.get('PATH', '')}"
 
-        # Prepare command
-        if isinstance(job_config.command, str):
-            command = job_config.command.split()
-        else:
-            command = job_config.command
-        if not isinstance(command, (list, tuple)):
-            raise ValueError(f'Expected list or tuple for {command=}')
+    command = [_tmpl(c).safe_substitute(env_vars) if '$' in c else c
+               for c in command]
 
-        # Set up environment variables
-        env_vars = _prepare_environment_variables(job_dir, job_name, env_config)
+    # Avoid starting a shell for simple commands which do not need one
+    shell = job_config.shell
+    if shell:
+        command, shell = shell_tools.drop_needless_shell(command, env_vars)
 
-        # Add venv to PATH
-        venv_bin = os.path.join(job_dir, "venv", "bin")
-        if os.name == "nt":  # Windows
-            venv_bin = os.path.join(job_dir, "venv", "Scripts")
-        env_vars["PATH"] = f"{venv_bin}{os.pathsep}{env_vars.get('PATH', '')}"
+    # Set working directory for command execution
+    cmd_working_dir = job_dir
+    if env_config.path:
+        cmd_working_dir = os.path.join(job_dir, env_config.path)
 
-        command = [Template(c).safe_substitute(env_vars) for c in command]
+    return {'command': command, 'cwd': cmd_working_dir, 'env': env_vars,
+            'shell': shell, 'timeout': job_config.timeout}
 
-        # Set working directory for command execution
-        cmd_working_dir = job_dir
-        if env_config.path:
-            cmd_working_dir = os.path.join(job_dir, env_config.path)
 
-        job_results = simple_run_command(
-            command, cwd=cmd_working_dir, env=env_vars, capture_output=True,
-            text=True, shell=job_config.shell, timeout=job_config.timeout)
-    except Exception as problem:
-        logging.exception('Unable to run command')
-        job_results = {"status": "error", "exit_code": -1,
-                       "error": str(problem), "output": "", "stderr": "",
-                       "command": []}
+def missing_job_results(job_name: str) -> Dict[str, Any]:
+    """Results for a job_name which is not in the task plan."""
+    return {"status": "error", "exit_code": -1,
+            "error": f"Job '{job_name}' not found in task plan",
+            "output": "", "stderr": ""}
+
 
-    notify_result(task_plan, job_config.note, job_results, env_vars)
+def failed_job_results(problem: Exception) -> Dict[str, Any]:
+    """Results for a job which could not be run due to problem."""
+    logging.exception('Unable to run command')
+    return {"status": "error", "exit_code": -1,
+            "error": str(problem), "output": "", "stderr": "",
+            "command": []}
+
+
+def finish_job(task_plan: models.TaskPlan, job_name: str,
+               job_spec: Dict[str, Any], job_results: Dict[str, Any],
+               re_raise=True, note_queue=None) -> Dict[str, Any]:
+    """Notify about job_results and raise if needed for a finished job."""
+    job_config = task_plan.jobs[job_name]
+    command = job_spec.get('command', 'unknown')
+    notify_result(task_plan, job_config.note, job_results,
+                  job_spec.get('env', {}), note_queue=note_queue)
 
     if job_results['exit_code']:
         logging.warning(
@@ -329,35 +577,97 @@ def run_job(working_dir: str, task_plan: models.TaskPlan,
     return job_results
 
 
+def run_job(working_dir: str, task_plan: models.TaskPlan,
+            job_name: str, re_raise=True,
+            note_queue=None, setup_errors=None) -> Dict[str, Any]:
+    """Run a single job from the task plan.
+
+    Args:
+        working_dir: Base working directory for job execution
+        task_plan: Parsed task plan containing job definitions
+        job_name: Name of the job to run
+        note_queue: Optional NotificationQueue to queue notifications in
+                    instead of sending them immediately
+        setup_errors: Optional result of _setup_job_environments; jobs
+                      in it fail with the recorded error
+
+    Returns:
+        Dictionary containing job execution results
+    """
+    if job_name not in task_plan.jobs:
+        return missing_job_results(job_name)
+
+    job_spec = {}
+    try:
+        job_spec = prepare_job(working_dir, task_plan, job_name,
+                               setup_errors)
+        command = job_spec['command']
+        job_results = simple_run_command(
+            command, cwd=job_spec['cwd'], env=job_spec['env'],
+            capture_output=True, text=True, shell=job_spec['shell'],
+            timeout=job_spec['timeout'])
+    except Exception as problem:
+        job_results = failed_job_results(problem)
+
+    return finish_job(task_plan, job_name, job_spec, job_results,
+                      re_raise, note_queue)
+
+
+def _load_json_plan_data(task_plan_path: Path) -> Dict[str, Any]:
+    """Load task plan data from a JSON file."""
+    return _json_loads(task_plan_path.read_bytes())
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_plan(path: str, raw_data: bytes):
+    """Compile Python plan file contents (cached by path and contents)."""
+    return compile(raw_data, path, 'exec')
+
+
+def _load_py_plan_data(task_plan_path: Path) -> Dict[str, Any]:
+    """Load task plan data by executing a Python file.
+
+    We exec the compiled file in a fresh namespace instead of importing
+    it since we only need a few globals and do not want it registered
+    in sys.modules.
+    """
+    path = str(task_plan_path)
+    code = _compile_plan(path, task_plan_path.read_bytes())
+    namespace = {'__name__': 'task_plan', '__file__': path}
+    exec(code, namespace)  # pylint: disable=exec-used
+
+    # Extract task plan data from namespace
+    return {
+        "envs": namespace.get("envs", {}),
+        "notes": namespace.get("notes", {}),
+        "jobs": namespace.get("jobs", {})
+    }
+
+
+# Map from (lower case) file suffix to function to load plan data.
+_PLAN_LOADERS = {
+    ".json": _load_json_plan_data,
+    ".py": _load_py_plan_data,
+}
+
+
 def _parse_task_plan_file(task_plan_file: str) -> models.TaskPlan:
-    """Parse task plan file and return TaskPlan object."""
-    task_plan_path = Path(task_plan_file)
+    """Parse task plan file and return TaskPlan object.
 
-    if task_plan_path.suffix.lower() == ".json":
-        # Parse JSON file
-        with open(task_plan_path, 'r') as f:
-            task_data = json.load(f)
-    elif task_plan_path.suffix.lower() == ".py":
-        # Parse Python module
-        spec = importlib.util.spec_from_file_location(
-            "task_plan", task_plan_path
-        )
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-
-        # Extract task plan data from module
-        task_data = {
-            "envs": getattr(module, "envs", {}),
-            "notes": getattr(module, "notes", {}),
-            "jobs": getattr(module, "jobs", {})
-        }
-    else:
+    Args:
+        task_plan_file: Path to JSON or Python file with the task plan.
+    """
+    task_plan_path = Path(task_plan_file)
+    suffix = task_plan_path.suffix.lower()
+    loader = _PLAN_LOADERS.get(suffix)
+    if loader is None:
         raise ValueError(
             f"Unsupported file type: {task_plan_path.suffix}. "
-            "Use .json or .py files."
+            f"Use {' or '.join(_PLAN_LOADERS)} files."
         )
 
-    return models.TaskPlan(**task_data)
+    task_data = loader(task_plan_path)
+    return models.TaskPlan.from_dict(task_data)
 
 
 @main.command()
@@ -369,8 +679,12 @@ def _parse_task_plan_file(task_plan_file: str) -> models.TaskPlan:
 @click.option(
     "--re-raise/--no-re-raise", default=False, help=(
         'If --re-raise is provided we raise an Exception if a job fails.'))
+@click.option(
+    "--max-jobs", type=click.IntRange(min=1), default=1, help=(
+        'Maximum number of jobs to run at once (default 1).'))
 @click.argument("task_plan_file", type=click.Path(exists=True))
-def run(working_dir: str, task_plan_file: str, re_raise: bool) -> None:
+def run(working_dir: str, task_plan_file: str, re_raise: bool,
+        max_jobs: int = 1) -> None:
     """Run all jobs defined in a task plan file.
 
     TASK_PLAN_FILE: Path to JSON or Python file containing task definitions
@@ -378,6 +692,13 @@ def run(working_dir: str, task_plan_file: str, re_raise: bool) -> None:
 If you provide --re-raise, then an Exception will be raised if any job
 fails. This can be helpful if you want to debug or if you just want to
 stop execution of all tasks if any task fails.
+
+Notifications are queued while jobs run and sent in a batch per
+notifier after the jobs finish so connections can be reused.
+
+If you provide --max-jobs N with N > 1, then up to N jobs run at once
+which can save a lot of time if jobs spend most of their time waiting
+(e.g., for the network). Jobs must then not depend on each other.
     """
     # Set default working directory
     if working_dir is None:
@@ -400,30 +721,22 @@ stop execution of all tasks if any task fails.
     click.echo(f"Working directory: {working_dir}")
     click.echo("-" * 60)
 
-    for job_name in task_plan.jobs:
-        click.echo(f"Running job: {job_name}")
-
-        job_result = run_job(working_dir, task_plan, job_name, re_raise)
-        all_results[job_name] = job_result
-
-        # Print job status
-        status_color = "green" if job_result["status"] == "success" else "red"
-        click.echo(
-            f"  Status: {click.style(job_result['status'], fg=status_color)}"
-        )
-        short_msg = comm_utils.shorten_msg(
-            job_result.get('output', 'unknown'), max_len=(
-                400 if job_result['exit_code'] == 0 else 2000))
-        click.echo(f"  Output: {click.style(short_msg, fg=status_color)}")
-        if job_result.get("exit_code") is not None:
-            click.echo(f"  Exit Code: {job_result['exit_code']}")
-
-        if job_result.get("error"):
-            click.echo(f"  Error: {job_result['error']}")
-            click.echo(f"  stdout: {job_result.get('stdout', 'None')}")
-            click.echo(f"  stderr: {job_result['stderr']}")
-
-        click.echo()
+    setup_errors = _setup_job_environments(working_dir, task_plan)
+    note_queue = NotificationQueue()
+    try:
+        if max_jobs > 1:
+            # Import here so runs without --max-jobs skip loading asyncio.
+            from ox_task.ui import (  # pylint: disable=import-outside-toplevel
+                async_jobs)
+            async_jobs.run_jobs(working_dir, task_plan, re_raise, note_queue,
+                                all_results, max_jobs, setup_errors)
+        else:
+            _run_jobs(working_dir, task_plan, re_raise, note_queue,
+                      all_results, setup_errors)
+    finally:
+        note_failures = note_queue.flush()
+    if note_failures:
+        click.echo(f"Failed to send {note_failures} notifications", err=True)
 
     # Summary
     successful = sum(1 for r in all_results.values()
@@ -438,5 +751,51 @@ stop execution of all tasks if any task fails.
         sys.exit(1)
 
 
+def _run_jobs(working_dir: str, task_plan: models.TaskPlan, re_raise: bool,
+              note_queue: NotificationQueue,
+              all_results: Dict[str, Dict[str, Any]],
+              setup_errors=None) -> None:
+    """Run each job in task_plan and echo its status.
+
+    Results are stored in all_results as they finish so the caller
+    still has partial results if a job raises.
+    """
+    for job_name in task_plan.jobs:
+        click.echo(f"Running job: {job_name}")
+
+        job_result = run_job(working_dir, task_plan, job_name, re_raise,
+                             note_queue=note_queue,
+                             setup_errors=setup_errors)
+        all_results[job_name] = job_result
+        echo_job_result(job_result)
+
+
+def echo_job_result(job_result: Dict[str, Any]) -> None:
+    """Echo the status of a finished job.
+
+    The lines are joined and written with a single click.echo since
+    writes to a slow terminal or pipe can dominate for small jobs.
+    """
+    status_color = "green" if job_result["status"] == "success" else "red"
+    short_msg = job_result.get('output', 'unknown')
+    max_len = 400 if job_result['exit_code'] == 0 else 2000
+    if len(short_msg) > max_len or short_msg.count('\n') >= 6:
+        # Only call shorten_msg (with its default of 6 lines) if needed
+        short_msg = comm_utils.shorten_msg(short_msg, max_len=max_len)
+    lines = [
+        f"  Status: {click.style(job_result['status'], fg=status_color)}",
+        f"  Output: {click.style(short_msg, fg=status_color)}"]
+    if job_result.get("exit_code") is not None:
+        lines.append(f"  Exit Code: {job_result['exit_code']}")
+
+    if job_result.get("error"):
+        lines.extend([f"  Error: {job_result['error']}",
+                      f"  stdout: {job_result.get('stdout', 'None')}",
+                      f"  stderr: {job_result['stderr']}"])
+
+    lines.append('')  # blank line between jobs
+    click.echo('\n'.join(lines))
+
+
 if __name__ == "__main__":
     main()
@@ -3,24 +3,80 @@
 
 import os
 import json
-import tempfile
-import shutil
+from types import MappingProxyType, SimpleNamespace
 
 import pytest
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _dump_json(path, data):
+    """Write data to path as compact JSON using orjson if available."""
+    if orjson is not None:
+        raw = orjson.dumps(data)
+    else:
+        raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as fdesc:
+        fdesc.write(raw)
+
 
 @pytest.fixture(name="temp_dir")
-def make_temp_dir():
-    """Create a temporary directory for tests."""
-    my_temp_dir = tempfile.mkdtemp()
-    yield my_temp_dir
-    shutil.rmtree(my_temp_dir)
+def make_temp_dir(tmp_path):
+    """Temporary directory for a test as a string.
+
+    This is pytest's tmp_path which lives under one base directory per
+    session that pytest cleans up itself (keeping the last few runs).
+    """
+    return str(tmp_path)
+
+
+@pytest.fixture(name="dump_json", scope="session")
+def make_dump_json():
+    """Function to write data to a path as JSON: dump_json(path, data)."""
+    return _dump_json
+
+
+@pytest.fixture(name="runner", scope="class")
+def make_runner():
+    """Click CliRunner shared by the tests in a class."""
+    import click.testing  # pylint: disable=import-outside-toplevel
+    return click.testing.CliRunner()
+
+
+@pytest.fixture(name="class_requests_mocker", scope="class")
+def make_class_requests_mocker():
+    """requests_mock.Mocker installed once for all tests in a class.
+
+    Entering and exiting a Mocker patches requests globally so we only
+    do it once per class; tests should use requests_mocker instead.
+    """
+    requests_mock = pytest.importorskip("requests_mock")
+    with requests_mock.Mocker() as mocker:
+        yield mocker
+
+
+@pytest.fixture(name="requests_mocker")
+def make_requests_mocker(class_requests_mocker):
+    """Class scoped requests_mock.Mocker with call history reset.
+
+    Tests register the URLs they need via requests_mocker.get(...), etc.
+    """
+    class_requests_mocker.reset_mock()
+    return class_requests_mocker
 
 
-@pytest.fixture(name="sample_task_plan_data")
+@pytest.fixture(name="sample_task_plan_data", scope="session")
 def make_sample_task_plan_data():
-    """Sample task plan data for testing based on tasks.json example."""
-    return {
+    """Sample task plan data for testing based on tasks.json example.
+
+    This is shared by all tests so it is read-only; tests which need
+    extra jobs should build a new dict by shallow merging, e.g.,
+    {**sample_task_plan_data, "jobs": {**old_jobs, "new_job": {...}}}.
+    """
+    return MappingProxyType({
         "envs": {
             "test_python": {
                 "runtime": "python3",
@@ -73,32 +129,83 @@ def make_sample_task_plan_data():
                 "path": "/tmp/ox_task_test_${OX_TASK_JOB_NAME}.txt"
             }
         }
-    }
+    })
+
+
+@pytest.fixture(name="plans_dir", scope="session")
+def make_plans_dir(tmp_path_factory):
+    """Directory for task plan files shared by all tests."""
+    return str(tmp_path_factory.mktemp("plans"))
 
 
-@pytest.fixture(name="sample_task_plan_json")
-def make_sample_task_plan_json(temp_dir, sample_task_plan_data):
-    """Create a sample task plan JSON file."""
-    json_file = os.path.join(temp_dir, "test_tasks.json")
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(sample_task_plan_data, f, indent=2)
+@pytest.fixture(name="sample_task_plan_json", scope="session")
+def make_sample_task_plan_json(plans_dir, sample_task_plan_data):
+    """Create a sample task plan JSON file (shared, do not modify)."""
+    json_file = os.path.join(plans_dir, "test_tasks.json")
+    _dump_json(json_file, dict(sample_task_plan_data))
     return json_file
 
 
-@pytest.fixture
-def sample_task_plan_py(temp_dir, sample_task_plan_data):
-    """Create a sample task plan Python file."""
-    py_file = os.path.join(temp_dir, "test_tasks.py")
+@pytest.fixture(scope="session")
+def sample_task_plan_py(plans_dir, sample_task_plan_data):
+    """Create a sample task plan Python file (shared, do not modify)."""
+    py_file = os.path.join(plans_dir, "test_tasks.py")
+    # JSON is valid Python for this data once true/false/null are defined.
     with open(py_file, 'w', encoding='utf-8') as f:
         f.write(f"""
 # Task plan as Python module
-envs = {sample_task_plan_data['envs']!r}
-jobs = {sample_task_plan_data['jobs']!r}
-notes = {sample_task_plan_data['notes']!r}
+true, false, null = True, False, None
+envs = {json.dumps(sample_task_plan_data['envs'])}
+jobs = {json.dumps(sample_task_plan_data['jobs'])}
+notes = {json.dumps(sample_task_plan_data['notes'])}
 """)
     return py_file
 
 
+@pytest.fixture(name="plans", scope="session")
+def make_plans(plans_dir, sample_task_plan_data, sample_task_plan_json,
+               sample_task_plan_py):
+    """Task plan files written once per session (shared, do not modify).
+
+    Attributes are paths: json_path and py_path are the sample task
+    plan while the others add a job to it or describe a broken plan.
+    """
+    data = sample_task_plan_data
+    extra_jobs = {
+        "command_test": {"list_command": {
+            "env": "minimal_env",
+            "note": "test_file",
+            "timeout": 5,
+            "shell": False,
+            "command": ["echo", "list_command_output"]
+        }},
+        "timeout_test": {"test_timeout": {
+            "env": "test_python",
+            "note": "test_file",
+            "timeout": 1,  # 1 second timeout
+            "command": ["python", "-c", "import time; time.sleep(5)"]
+        }},
+    }
+    contents = {name: {**data, "jobs": {**data["jobs"], **jobs}}
+                for name, jobs in extra_jobs.items()}
+    contents["missing_env"] = {
+        "envs": {},
+        "jobs": {
+            "test_job": {
+                "env": "nonexistent_env",
+                "command": ["echo", "test"]
+            }
+        },
+        "notes": {}
+    }
+    paths = {}
+    for name, plan_data in contents.items():
+        paths[name] = os.path.join(plans_dir, f"{name}.json")
+        _dump_json(paths[name], plan_data)
+    return SimpleNamespace(json_path=sample_task_plan_json,
+                           py_path=sample_task_plan_py, **paths)
+
+
 @pytest.fixture
 def golden_files_dir(temp_dir):
     """Directory for golden test files."""